@@ -0,0 +1,82 @@
+"""
+Numba-compiled kernels for the racing engine's per-point GPS math
+Compiled on first call, cached on disk (cache=True) for later processes
+Kernels release the GIL (nogil=True), so the ingest thread and request threads
+are not serialized behind a lap being processed
+"""
+import math
+
+import numpy as np
+from numba import njit
+
+EARTH_RADIUS_M = 6371000.0
+
+
+@njit(cache=True, nogil=True)
+def haversine(lat1, lon1, lat2, lon2):
+    """Distance between two GPS points in meters"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return EARTH_RADIUS_M * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+@njit(cache=True, nogil=True)
+def distances_from(lat0, lon0, lats, lons, out):
+    """Distance from (lat0, lon0) to every point, written into out"""
+    for i in range(lats.shape[0]):
+        out[i] = haversine(lat0, lon0, lats[i], lons[i])
+    return out
+
+
+def first_within(lat0, lon0, lats, lons, radius):
+    """Index of first point within radius meters of (lat0, lon0), or -1"""
+    out = distances_from(lat0, lon0, lats, lons, np.empty(lats.shape[0], dtype=np.float64))
+    hits = np.flatnonzero(out < radius)
+    return int(hits[0]) if hits.size else -1
+
+
+# ---------- Lap pass (every per-sample scan of a lap in one sweep) ----------
+
+@njit(cache=True, nogil=True)
+def lap_pass(speeds, smoothed):
+    """
+    One sweep over a lap's speed trace (n >= 2) returning
+    (speed_sum, max_speed, abs_step_sum, corner_idx, brake_idx, accel_idx)
+    Corners: smoothed local minima below 40 km/h (3-sample neighbours), 5 samples from either end
+    Braking: dropped more than 3 km/h from the previous sample (last sample excluded)
+    Acceleration: gained more than 2 km/h over the previous sample (last sample excluded)
+    """
+    n = speeds.shape[0]
+    corners = np.empty(n, dtype=np.int64)
+    brake = np.empty(n, dtype=np.int64)
+    accel = np.empty(n, dtype=np.int64)
+    c = 0
+    b = 0
+    a = 0
+    speed_sum = speeds[0]
+    max_speed = speeds[0]
+    abs_step_sum = 0.0
+    for i in range(1, n):
+        v = speeds[i]
+        speed_sum += v
+        if v > max_speed:
+            max_speed = v
+        step = v - speeds[i - 1]
+        abs_step_sum += abs(step)
+        if i == n - 1:
+            break
+        if step < -3:
+            brake[b] = i
+            b += 1
+        elif step > 2:
+            accel[a] = i
+            a += 1
+        if 5 <= i < n - 5:
+            s = smoothed[i]
+            if s < smoothed[i - 3] and s < smoothed[i + 3] and s < 40:
+                corners[c] = i
+                c += 1
+    return speed_sum, max_speed, abs_step_sum, corners[:c], brake[:b], accel[:a]
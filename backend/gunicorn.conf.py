@@ -0,0 +1,31 @@
+# Gunicorn config for the Racing Telemetry API
+# Usage: gunicorn racing_api_server:app --config gunicorn.conf.py
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 10000)}"
+
+# One worker keeps a single shared telemetry_api (engine state lives in memory);
+# threads serve concurrent dashboard polls in parallel
+workers = 1
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+timeout = 60
+keepalive = 5
+
+# Import the app once in the master, start MQTT/ingest threads in the worker
+preload_app = True
+
+
+def post_fork(server, worker):
+    from racing_api_server import pin_engine_threads, start_ingest, start_mqtt
+
+    # Ingest/request threads inherit this mask; start_mqtt pins paho's loop apart
+    pin_engine_threads()
+
+    # HTTP ingestion works even if the broker is unreachable
+    start_ingest()
+    try:
+        start_mqtt()
+        server.log.info("MQTT client started in worker %s", worker.pid)
+    except Exception as e:
+        server.log.error("MQTT start failed: %s", e)
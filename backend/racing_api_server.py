@@ -1,64 +1,374 @@
 import paho.mqtt.client as mqtt
 import ssl
-import json
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-import json
+from flask_compress import Compress
+import orjson
+import msgspec
+import numpy as np
 from datetime import datetime
+from collections import deque
+from functools import wraps
+import queue
+import threading
+import time
 import os
 import sys
 
 # Import the racing engine
 from racing_engine_gps_speed import RacingTelemetryAPI
 
+MQTT_CONFIG = {
+    "broker": "f08ca48a560941289a2893683c0ff7a6.s1.eu.hivemq.cloud",
+    "port": 8883,
+    "username": "teamtrydan",
+    "password": "Trydan25",
+    "topic": "kart/gps/teamXkart01/telemetry"
+}
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson (native numpy + int-key support)"""
+
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 CORS(app)  # Enable CORS for frontend communication
 
+class CompressedBodyCache:
+    """
+    Compressed bodies of cached_json responses
+    Keeps only the latest state per (endpoint, Accept-Encoding)
+    """
+
+    def __init__(self):
+        self._store = {}
+
+    def get(self, key):
+        if key is None:
+            return None
+        name, state_key, encoding = key
+        entry = self._store.get((name, encoding))
+        return entry[1] if entry and entry[0] == state_key else None
+
+    def set(self, key, value):
+        if key is None:
+            return
+        name, state_key, encoding = key
+        self._store[(name, encoding)] = (state_key, value)
+
+def compress_cache_key(req):
+    """Set by cached_json; None means the response is compressed per request"""
+    return g.get('compress_cache_key')
+
+# Compress large JSON (dashboard, racing line, lap history)
+app.config['COMPRESS_MIN_SIZE'] = 512
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_CACHE_BACKEND'] = CompressedBodyCache
+app.config['COMPRESS_CACHE_KEY'] = compress_cache_key
+compress = Compress(app)
+
 # Initialize Racing Engine
 telemetry_api = RacingTelemetryAPI(race_total_laps=20)
 
-def on_connect(client, userdata, flags, rc):
-    print("✅ Connected to HiveMQ from Flask")
-    client.subscribe(MQTT_CONFIG["topic"])
+# ========== TELEMETRY INGESTION ==========
 
-def on_message(client, userdata, msg):
-    try:
-        payload = json.loads(msg.payload.decode())
+INGEST_INTERVAL = 0.01      # Seconds between queue drains
+INGEST_BATCH_SIZE = 1000    # Max points handed to the engine per drain
+INGEST_MAX_QUEUE = 50000    # MQTT drops oldest beyond this, HTTP gets 503
+
+# Points waiting for the engine (MQTT + HTTP share this buffer)
+_ingest_q = deque(maxlen=INGEST_MAX_QUEUE)
+_ingest_thread = None
+_ingest_lock = threading.Lock()
+
+# Single MQTT client per process (reused across start_mqtt calls)
+_mqtt_client = None
+_mqtt_lock = threading.Lock()
 
-        # 🔥 Normalize data for engine
-        clean_data = {
-            "lat": float(payload.get("lat")),
-            "lon": float(payload.get("lon")),
-            "speed": float(payload.get("speed", 0)),
-            "timestamp": float(payload.get("timestamp"))
-        }
+# paho's network loop gets this core, Flask/engine threads get the rest
+MQTT_CPU = 0
 
-        telemetry_api.process_telemetry_point(clean_data)
+class TelemetryPoint(msgspec.Struct, gc=False):
+    """
+    Telemetry sample as sent by the kart (numeric strings are coerced)
+    Slotted, untracked by the GC: ~64 bytes queued vs ~184 for a dict
+    """
+    lat: float
+    lon: float
+    timestamp: float
+    speed: float = 0.0
+
+# Decodes + validates + coerces MQTT JSON bytes in one C pass
+_point_decoder = msgspec.json.Decoder(TelemetryPoint, strict=False)
+
+def decode_point(raw):
+    """Raw MQTT payload bytes -> TelemetryPoint"""
+    return _point_decoder.decode(raw)
+
+def normalize_point(payload):
+    """Already-parsed payload (HTTP JSON body) -> TelemetryPoint"""
+    return msgspec.convert(payload, TelemetryPoint, strict=False)
+
+def ingest_worker():
+    """Drain queued telemetry into the engine in batches"""
+    while True:
+        time.sleep(INGEST_INTERVAL)
+        count = min(len(_ingest_q), INGEST_BATCH_SIZE)
+        if not count:
+            continue
+
+        # Engine works on point dicts: convert the whole batch in one C call
+        batch = msgspec.to_builtins([_ingest_q.popleft() for _ in range(count)])
+        try:
+            completed_laps = telemetry_api.process_telemetry_batch(batch)
+        except Exception as e:
+            print("Telemetry Batch Error:", e)
+            continue
+
+        if _subscribers:
+            try:
+                publish_batch_events(batch[-1], completed_laps)
+            except Exception as e:
+                print("Telemetry Publish Error:", e)
+
+def start_ingest():
+    """Start the background ingest thread once"""
+    global _ingest_thread
+    with _ingest_lock:
+        if _ingest_thread is None:
+            _ingest_thread = threading.Thread(target=ingest_worker, daemon=True)
+            _ingest_thread.start()
+    return _ingest_thread
+
+# Hot-path names are bound as default args (LOAD_FAST per callback)
+def on_connect(client, userdata, flags, reason_code, properties, _topic=MQTT_CONFIG["topic"]):
+    if reason_code.is_failure:
+        print("MQTT Connect Failed:", reason_code)
+        return
+    print("✅ Connected to HiveMQ from Flask")
+    client.subscribe(_topic)
+
+def on_message(client, userdata, msg, _append=_ingest_q.append, _decode=decode_point):
+    try:
+        # 🔥 Validate + normalize data for engine
+        _append(_decode(msg.payload))
 
     except Exception as e:
         print("MQTT Processing Error:", e)
 
+def mqtt_tls_context():
+    """
+    TLS context for the broker, built once and reused on reconnects
+    AES-GCM suites (AES-NI) only, no renegotiation
+    """
+    ctx = ssl.create_default_context()
+    ctx.check_hostname = False
+    ctx.verify_mode = ssl.CERT_NONE
+    ctx.minimum_version = ssl.TLSVersion.TLSv1_2
+    ctx.options |= ssl.OP_NO_RENEGOTIATION
+    ctx.set_ciphers('ECDHE+AESGCM')
+    return ctx
+
+_mqtt_tls_context = mqtt_tls_context()
+
+def can_pin_cpus():
+    """True on Linux hosts where MQTT_CPU plus at least one other core are usable"""
+    cpus = os.sched_getaffinity(0) if hasattr(os, 'sched_getaffinity') else set()
+    return MQTT_CPU in cpus and len(cpus) > 1
+
+_pin_cpus = can_pin_cpus()
+
+def pin_engine_threads():
+    """Keep the calling thread (and threads it starts later) off MQTT_CPU"""
+    if _pin_cpus:
+        os.sched_setaffinity(0, os.sched_getaffinity(0) - {MQTT_CPU})
+
+def pin_mqtt_thread(client):
+    """Pin paho's network loop thread to MQTT_CPU"""
+    try:
+        if _pin_cpus:
+            os.sched_setaffinity(client._thread.native_id, {MQTT_CPU})
+    except (AttributeError, OSError) as e:
+        print("MQTT thread pinning unavailable:", e)
+
 def start_mqtt():
-    client = mqtt.Client()
-    client.username_pw_set(MQTT_CONFIG["username"], MQTT_CONFIG["password"])
-    client.tls_set(cert_reqs=ssl.CERT_NONE)
-    client.tls_insecure_set(True)
+    """Connect the process-wide MQTT client once and start its network loop"""
+    global _mqtt_client
+    start_ingest()
+
+    with _mqtt_lock:
+        if _mqtt_client is not None:
+            return _mqtt_client
+
+        client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        client.username_pw_set(MQTT_CONFIG["username"], MQTT_CONFIG["password"])
+        client.tls_set_context(_mqtt_tls_context)
+        client.tls_insecure_set(True)
+
+        client.on_connect = on_connect
+        client.on_message = on_message
+
+        client.connect(MQTT_CONFIG["broker"], MQTT_CONFIG["port"], 60)
+        client.loop_start()
+        pin_mqtt_thread(client)
+        _mqtt_client = client
+        return client
+
+# ========== LIVE STREAM (SSE) ==========
+
+STREAM_KEEPALIVE = 15        # Seconds between keep-alive comments
+STREAM_MAX_PENDING = 256     # Events buffered per slow client before dropping
+
+# One queue per connected /api/stream client
+_subscribers = set()
+_subscribers_lock = threading.Lock()
+
+def publish(event):
+    """Fan an event out to every stream subscriber (never blocks ingest)"""
+    data = orjson.dumps(event, option=ORJSONProvider.option)
+    with _subscribers_lock:
+        subscribers = list(_subscribers)
+    for q in subscribers:
+        try:
+            q.put_nowait(data)
+        except queue.Full:
+            pass
+
+def publish_batch_events(last_point, completed_laps):
+    """Push finished laps and the latest position after an ingest batch"""
+    for result in completed_laps:
+        lap = result['lap_data']
+        publish({
+            'type': 'lap',
+            'lap_number': lap['lap_number'],
+            'total_time': lap['total_time'],
+            'avg_speed': lap['avg_speed'],
+            'max_speed': lap['max_speed'],
+            'tire_status': lap['tire_status'],
+            'performance': lap.get('performance'),
+            'race_strategy': result['race_strategy']
+        })
+    publish({'type': 'position', **last_point})
 
-    client.on_connect = on_connect
-    client.on_message = on_message
+# ========== RESPONSE CACHE ==========
 
-    client.connect(MQTT_CONFIG["broker"], MQTT_CONFIG["port"], 60)
-    client.loop_start()
-    return client
+# endpoint name -> (state key, serialized body, mimetype, extra headers)
+_cache = {}
 
-MQTT_CONFIG = {
-    "broker": "f08ca48a560941289a2893683c0ff7a6.s1.eu.hivemq.cloud",
-    "port": 8883,
-    "username": "teamtrydan",
-    "password": "Trydan25",
-    "topic": "kart/gps/teamXkart01/telemetry"
-}
+# Rebuilt by the response class on replay
+_REPLAY_SKIP_HEADERS = {'Content-Type', 'Content-Length'}
+
+# State keys restart from zero with the process, so tags carry a boot id
+_etag_boot = (None, '')
+
+def etag_boot_id():
+    """
+    Boot id of the current process, made lazily so a preloaded app's
+    forked (and respawned) workers never reuse the master's id
+    """
+    global _etag_boot
+    pid = os.getpid()
+    if _etag_boot[0] != pid:
+        _etag_boot = (pid, f"{pid:x}{time.time_ns():x}")
+    return _etag_boot[1]
+
+def engine_state_key():
+    """Changes only when a lap is processed or a session is loaded"""
+    engine = telemetry_api.engine
+    return (len(engine.lap_history), engine.revision)
+
+def dashboard_state_key():
+    """Dashboard also carries the live position and race length"""
+    return engine_state_key() + (
+        len(telemetry_api.current_lap_buffer),
+        telemetry_api.race_total_laps
+    )
+
+def binary_state_key():
+    """Binary and JSON variants of an endpoint are cached separately"""
+    return engine_state_key() + (wants_binary(),)
+
+def lap_history_state_key():
+    """Lap history tail also depends on the requested limit"""
+    return binary_state_key() + (request.args.get('limit', 15, type=int),)
+
+def etag_matches(etag):
+    """
+    If-None-Match check that ignores the ':<alg>' suffix Flask-Compress
+    appends to tags of compressed bodies (it runs after make_conditional)
+    """
+    tags = request.if_none_match
+    return tags.star_tag or any(
+        tag.split(':', 1)[0] == etag for tag in tags.as_set(include_weak=True)
+    )
+
+def cached_json(key_func=engine_state_key):
+    """
+    Serve the last JSON body for an endpoint until its state key changes
+    The key doubles as ETag, so unchanged polls get 304 with no body
+    """
+    def decorator(view):
+        name = view.__name__
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = key_func()
+            etag = '-'.join([name, etag_boot_id()] + [str(k) for k in key])
+            # Same body for the same key, so its compressed form can be reused too
+            compress_key = (name, key, request.headers.get('Accept-Encoding', ''))
+
+            hit = _cache.get(name)
+            if hit and hit[0] == key:
+                response = app.response_class(hit[1], mimetype=hit[2], headers=hit[3])
+            else:
+                response = app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                headers = [(k, v) for k, v in response.headers if k not in _REPLAY_SKIP_HEADERS]
+                _cache[name] = (key, response.get_data(), response.mimetype, headers)
+
+            g.compress_cache_key = compress_key
+            response.set_etag(etag)
+            # 304 with no body when If-None-Match already has this state
+            if etag_matches(etag):
+                response.status_code = 304
+            return response
+        return wrapper
+    return decorator
+
+# ========== BINARY RESPONSES ==========
+
+# Per-lap summary row for /api/lap_history (little-endian float32)
+LAP_SUMMARY_DTYPE = np.dtype([
+    ('lap_number', '<f4'),
+    ('total_time', '<f4'),
+    ('avg_speed', '<f4'),
+    ('max_speed', '<f4')
+])
+
+def wants_binary():
+    """Client asked for packed arrays instead of JSON"""
+    return 'application/octet-stream' in request.headers.get('Accept', '')
+
+def vary_on_accept(response):
+    """Mark a content-negotiated response so proxies cache each variant"""
+    response.headers['Vary'] = 'Accept'
+    return response
+
+def binary_response(arr, fields):
+    """Raw little-endian float32 buffer, field order in X-Fields header"""
+    response = Response(arr.tobytes(), mimetype='application/octet-stream')
+    response.headers['X-Fields'] = ','.join(fields)
+    return vary_on_accept(response)
 
 # ========== API ENDPOINTS ==========
 
@@ -67,24 +377,72 @@ def receive_telemetry():
     """
     Receive real-time telemetry from MQTT bridge
     Expected: {timestamp, lat, lon, speed}
+    Points are queued and processed in batches by the ingest thread
     """
     try:
-        data = request.json
-        result = telemetry_api.process_telemetry_point(data)
-        return jsonify(result)
+        if len(_ingest_q) >= INGEST_MAX_QUEUE:
+            # Push back on the sender instead of evicting queued points
+            response = jsonify({'error': 'Telemetry queue full', 'queued': len(_ingest_q)})
+            response.headers['Retry-After'] = '1'
+            return response, 503
+        
+        _ingest_q.append(normalize_point(request.json))
+        return jsonify({'status': 'QUEUED', 'queued': len(_ingest_q)}), 202
+    except msgspec.ValidationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/stream', methods=['GET'])
+def stream():
+    """
+    Server-Sent Events: 'position' after every ingest batch,
+    'lap' whenever a lap is finalized
+    """
+    q = queue.Queue(maxsize=STREAM_MAX_PENDING)
+    with _subscribers_lock:
+        _subscribers.add(q)
+
+    def events():
+        try:
+            while True:
+                try:
+                    data = q.get(timeout=STREAM_KEEPALIVE)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield b"data: " + data + b"\n\n"
+        finally:
+            with _subscribers_lock:
+                _subscribers.discard(q)
+
+    response = Response(events(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+# (snapshot dict it was built from, JSON bytes)
+_snapshot_json = (None, b'')
+
 @app.route('/api/dashboard', methods=['GET'])
+@cached_json(dashboard_state_key)
 def get_dashboard_data():
     """Get complete dashboard data"""
     try:
-        data = telemetry_api.get_dashboard_data()
-        return jsonify(data)
+        # Lap-level part is serialized once per snapshot, live position per call
+        global _snapshot_json
+        snapshot = telemetry_api.get_dashboard_snapshot()
+        if _snapshot_json[0] is not snapshot:
+            _snapshot_json = (snapshot, orjson.dumps(snapshot, option=ORJSONProvider.option))
+
+        position = orjson.dumps(telemetry_api.get_current_position())
+        body = b'{"current_position":' + position + b',' + _snapshot_json[1][1:]
+        return Response(body, mimetype='application/json')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/optimal_lap', methods=['GET'])
+@cached_json()
 def get_optimal_lap():
     """Get current optimal lap data"""
     try:
@@ -94,15 +452,22 @@ def get_optimal_lap():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/racing_line', methods=['GET'])
+@cached_json(binary_state_key)
 def get_racing_line():
-    """Get optimal racing line for map overlay"""
+    """
+    Get optimal racing line for map overlay
+    Accept: application/octet-stream -> packed float32 (lat, lon) pairs
+    """
     try:
-        racing_line = telemetry_api.engine.get_racing_line()
-        return jsonify(racing_line)
+        if wants_binary():
+            arr = telemetry_api.engine.get_racing_line_array().astype('<f4')
+            return binary_response(arr, ('lat', 'lon'))
+        return vary_on_accept(jsonify(telemetry_api.engine.get_racing_line()))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/improvement_zones', methods=['GET'])
+@cached_json()
 def get_improvement_zones():
     """Get sectors where driver is losing most time"""
     try:
@@ -125,6 +490,7 @@ def get_race_strategy():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/tire_status', methods=['GET'])
+@cached_json()
 def get_tire_status():
     """Get tire degradation status"""
     try:
@@ -136,6 +502,7 @@ def get_tire_status():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/performance', methods=['GET'])
+@cached_json()
 def get_performance():
     """Get driver performance metrics"""
     try:
@@ -147,6 +514,7 @@ def get_performance():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/corner_analysis', methods=['GET'])
+@cached_json()
 def get_corner_analysis():
     """Get corner-by-corner analysis"""
     try:
@@ -168,25 +536,14 @@ def get_overtaking_zones():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/session_stats', methods=['GET'])
+@cached_json()
 def get_session_stats():
     """Get session statistics"""
     try:
-        if not telemetry_api.engine.lap_history:
+        stats = telemetry_api.engine.get_session_stats()
+        if not stats:
             return jsonify({'status': 'NO_DATA'})
         
-        lap_times = [lap['total_time'] for lap in telemetry_api.engine.lap_history]
-        best_lap = min(telemetry_api.engine.lap_history, key=lambda x: x['total_time'])
-        
-        stats = {
-            'total_laps': len(telemetry_api.engine.lap_history),
-            'best_lap': best_lap,
-            'best_lap_time': best_lap['total_time'],
-            'best_lap_number': best_lap['lap_number'],
-            'average_lap_time': sum(lap_times) / len(lap_times),
-            'last_5_avg': sum(lap_times[-5:]) / len(lap_times[-5:]) if len(lap_times) >= 5 else None,
-            'consistency': min(100, (1 - (max(lap_times) - min(lap_times)) / min(lap_times)) * 100)
-        }
-        
         return jsonify(stats)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -195,12 +552,15 @@ def get_session_stats():
 def save_session():
     """Save current session"""
     try:
-        filename = telemetry_api.engine.save_session()
+        engine = telemetry_api.engine
+        # Files are written in the background: 202 now, failures show up in last_save_error
+        filename = engine.save_session()
         return jsonify({
-            'status': 'SUCCESS',
+            'status': 'QUEUED',
             'filename': filename,
-            'message': 'Session saved successfully'
-        })
+            'message': 'Session save queued',
+            'last_save_error': engine.last_save_error
+        }), 202
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -239,24 +599,42 @@ def set_race_laps():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/lap_history', methods=['GET'])
+@cached_json(lap_history_state_key)
 def get_lap_history():
-    """Get lap history"""
+    """
+    Get lap history
+    Accept: application/octet-stream -> packed LAP_SUMMARY_DTYPE rows
+    """
     try:
         limit = request.args.get('limit', 15, type=int)
         laps = telemetry_api.engine.lap_history[-limit:]
-        return jsonify(laps)
+        if wants_binary():
+            arr = np.array(
+                [(lap['lap_number'], lap['total_time'], lap['avg_speed'], lap['max_speed']) for lap in laps],
+                dtype=LAP_SUMMARY_DTYPE
+            )
+            return binary_response(arr, LAP_SUMMARY_DTYPE.names)
+        return vary_on_accept(jsonify(laps))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# (monotonic time built, JSON body) - refreshed at most once per second
+_health_cache = (float('-inf'), b'')
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
-        'status': 'ONLINE',
-        'service': 'Professional Racing Telemetry API',
-        'version': '2.0',
-        'timestamp': datetime.now().isoformat()
-    })
+    global _health_cache
+    now = time.monotonic()
+    if now - _health_cache[0] >= 1.0:
+        body = orjson.dumps({
+            'status': 'ONLINE',
+            'service': 'Professional Racing Telemetry API',
+            'version': '2.0',
+            'timestamp': datetime.now().isoformat()
+        })
+        _health_cache = (now, body)
+    return Response(_health_cache[1], mimetype='application/json')
 
 # ========== ERROR HANDLERS ==========
 
@@ -274,6 +652,8 @@ def internal_error(error):
 if __name__ == "__main__":
     print("Starting Racing Telemetry API...")
 
+    pin_engine_threads()
+    start_ingest()
     mqtt_client = start_mqtt()
 
     port = int(os.environ.get("PORT", 10000))
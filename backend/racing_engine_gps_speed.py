@@ -1,16 +1,105 @@
 
 import numpy as np
-import json
+from numpy.lib.stride_tricks import sliding_window_view
+import orjson
 from datetime import datetime
-from collections import defaultdict, deque
-from scipy.spatial.distance import cdist
+from bisect import bisect_right
+from collections import defaultdict, deque, namedtuple
+from functools import partial
+from itertools import islice
+import hashlib
+from scipy.spatial import cKDTree
 from scipy.interpolate import interp1d
-from scipy.signal import savgol_filter
+from scipy.signal import savgol_coeffs
 import pickle
 import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
 import warnings
 warnings.filterwarnings('ignore')
 
+from engine_kernels import first_within, haversine, lap_pass
+
+logger = logging.getLogger(__name__)
+
+# Savitzky-Golay speed smoothing (window 11, quadratic), coefficients solved once
+SG_WINDOW = 11
+SG_COEFFS = savgol_coeffs(SG_WINDOW, 2)
+# savgol_filter's default 'interp' edges: fit the first/last window, evaluate at each edge position
+SG_HEAD = np.array([savgol_coeffs(SG_WINDOW, 2, pos=j, use='dot') for j in range(SG_WINDOW // 2)])
+SG_TAIL = np.array([savgol_coeffs(SG_WINDOW, 2, pos=j, use='dot') for j in range(SG_WINDOW // 2 + 1, SG_WINDOW)])
+
+# History bounds (every reader only looks at the recent tail)
+CORNER_HISTORY = 50        # Passes kept per corner (running bests cover all passes)
+BRAKE_ZONE_HISTORY = 500   # Brake zones matched against, ~10+ laps
+LOG_HISTORY = 100          # Tire / performance / strategy log entries
+
+# Session JSON export (sector ids are int keys)
+SESSION_JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_INDENT_2
+
+# Initial live-lap buffer capacity in points (~3 min at 50 Hz), doubled if exceeded
+LAP_BUFFER_POINTS = 10000
+
+# Live lap-time prediction refresh (points) while the sector does not change
+PREDICTION_INTERVAL = 10
+
+# Sector boundaries by exact first-lap trace, shared by engine instances (replays)
+SECTOR_CACHE_SIZE = 32
+_sector_cache = {}
+
+# Label tables: bucket i covers [THRESHOLDS[i-1], THRESHOLDS[i])
+TIRE_GRIP_THRESHOLDS = (65, 75, 85, 95)
+TIRE_STATUS_LABELS = ('CRITICAL', 'WORN', 'FAIR', 'GOOD', 'EXCELLENT')
+RATING_THRESHOLDS = (60, 70, 75, 80, 85, 90, 95)
+RATING_LABELS = ('D', 'C', 'B', 'B+', 'A', 'A+', 'S', 'S+')
+RACE_PHASE_THRESHOLDS = (0.25, 0.5, 0.75)
+RACE_PHASE_LABELS = ('OPENING', 'EARLY', 'MIDDLE', 'CLOSING')
+
+# Corner type by 2 * severity bucket + fast apex
+CORNER_TYPE_TABLE = np.array(['MEDIUM', 'FAST', 'SLOW', 'SLOW', 'HAIRPIN', 'HAIRPIN'])
+
+# One lap as column arrays (built once per lap, shared by all detectors)
+LapArrays = namedtuple('LapArrays', 'ts lat lon speed')
+# Smoothed speeds + lap_pass results for one lap (see ProfessionalRacingEngine._scan_lap)
+LapScan = namedtuple('LapScan', 'smoothed speed_sum max_speed abs_step_sum corners brakes accels')
+
+def lap_arrays(lap_data):
+    """List of {timestamp, lat, lon, speed} -> LapArrays of float64 columns"""
+    if isinstance(lap_data, LapArrays):
+        return lap_data
+    n = len(lap_data)
+    return LapArrays(*(
+        np.fromiter((p[key] for p in lap_data), dtype=np.float64, count=n)
+        for key in ('timestamp', 'lat', 'lon', 'speed')
+    ))
+
+def sector_columns(lap, start, stop):
+    """
+    Samples [start, stop) of a lap as {field: array} (views, no copy)
+    Stored as sector 'data' instead of one dict per GPS point
+    """
+    return {
+        'timestamp': lap.ts[start:stop],
+        'lat': lap.lat[start:stop],
+        'lon': lap.lon[start:stop],
+        'speed': lap.speed[start:stop]
+    }
+
+def json_default(obj):
+    """JSON fallback: arrays and deques as lists, anything else as str"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, deque):
+        return list(obj)
+    return str(obj)
+
+def columns_from_points(points):
+    """Sector 'data' saved by older sessions (list of point dicts) -> columns"""
+    if isinstance(points, dict):
+        return points
+    lap = lap_arrays(points)
+    return sector_columns(lap, 0, len(points))
+
 class ProfessionalRacingEngine:
     """
     F1-Grade Professional Telemetry System
@@ -24,25 +113,113 @@ class ProfessionalRacingEngine:
         self.sector_definitions = sector_definitions
         self.sectors_data = defaultdict(list)
         self.optimal_lap = {}
+        self._optimal_total_time = 0.0  # Sum of optimal_lap sector times
+        self._best_sector_times = np.empty(0)  # optimal_lap times by sector id (inf = none yet)
+        self._optimal_elapsed = {}  # sector_id -> optimal sector timestamps minus its first one
+        # Bumped when optimal_lap or the best lap changes; keys the cached getters below
+        self._optimal_revision = 0
+        self._optimal_time_cache = (None, None)
+        self._racing_line_cache = (None, None, None)
         self.lap_history = []
-        self.current_lap_data = []
+        self.current_lap_data = lap_arrays([])
+        self.current_lap_scan = None
         self.sector_boundaries = []
+        self._sector_bounds_arr = np.empty(0, dtype=np.int64)  # sector_boundaries[1:], for searchsorted
         
         # Advanced analytics
-        self.corner_data = defaultdict(list)
-        self.brake_zones = []
+        self.corner_data = defaultdict(partial(deque, maxlen=CORNER_HISTORY))
+        self.corner_best = {}  # corner_id -> running bests over every recorded pass
+        self.brake_zones = deque(maxlen=BRAKE_ZONE_HISTORY)
+        self._brake_tree = None  # (KD-tree, zone list) over brake_zones, rebuilt lazily
+        self._lat0_cos = None    # Local projection scale, fixed per session
         self.acceleration_zones = []
-        self.tire_degradation_history = []
+        self.tire_degradation_history = deque(maxlen=LOG_HISTORY)
         self.consistency_analysis = []
         self.track_evolution = []
-        self.driver_performance_metrics = []
-        self.race_strategy_log = []
+        self.driver_performance_metrics = deque(maxlen=LOG_HISTORY)
+        self.race_strategy_log = deque(maxlen=LOG_HISTORY)
         self.overtaking_opportunities = []
         
         # Session data
         self.session_start_time = datetime.now()
         self.session_metadata = {}
         
+        # Bumped whenever lap-level state changes (used for response caching)
+        self.revision = 0
+        
+        # Session files are written off the caller's thread, one save at a time
+        self._io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='session-io')
+        self._pending_save = None
+        self.last_save_error = None  # str of the last failed background save, cleared on success
+        
+        # Rolling lap-time aggregates (updated as laps are appended)
+        self._reset_lap_stats()
+        
+    def _reset_lap_stats(self):
+        """Clear rolling lap-time aggregates"""
+        self.lap_stats = {
+            'sum': 0.0,
+            'n': 0,
+            'best': None,
+            'max': float('-inf'),
+            'min': float('inf'),
+            'last5': deque(maxlen=5)
+        }
+        # Lap times in lap order (grown by doubling, valid up to lap_stats['n'])
+        self._lap_times = np.empty(64, dtype=np.float64)
+        # Sector times per lap, same rows; NaN where a lap has no time for that sector
+        self._lap_sector_times = np.full((64, 1), np.nan)
+    
+    def _update_lap_stats(self, lap):
+        """Fold a finished lap into the rolling aggregates"""
+        s = self.lap_stats
+        t = lap['total_time']
+        s['sum'] += t
+        s['n'] += 1
+        s['last5'].append(t)
+        if s['best'] is None or t < s['best']['total_time']:
+            s['best'] = lap
+            self._optimal_revision += 1  # improvement_potential uses the best lap
+        s['max'] = max(s['max'], t)
+        s['min'] = min(s['min'], t)
+        
+        if s['n'] > self._lap_times.size:
+            self._lap_times = np.resize(self._lap_times, self._lap_times.size * 2)
+        self._lap_times[s['n'] - 1] = t
+        
+        rows, cols = self._lap_sector_times.shape
+        width = max(lap['sectors'], default=-1) + 1
+        if s['n'] > rows or width > cols:
+            self._lap_sector_times = np.pad(
+                self._lap_sector_times,
+                ((0, self._lap_times.size - rows), (0, max(width - cols, 0))),
+                constant_values=np.nan
+            )
+        row = self._lap_sector_times[s['n'] - 1]
+        for sector_id, sector in lap['sectors'].items():
+            row[sector_id] = sector['time']
+    
+    def lap_times(self):
+        """View of all completed lap times as a NumPy array"""
+        return self._lap_times[:self.lap_stats['n']]
+    
+    def get_session_stats(self):
+        """Session statistics from rolling aggregates (O(1))"""
+        s = self.lap_stats
+        if not s['n']:
+            return None
+        
+        best_lap = s['best']
+        return {
+            'total_laps': s['n'],
+            'best_lap': best_lap,
+            'best_lap_time': best_lap['total_time'],
+            'best_lap_number': best_lap['lap_number'],
+            'average_lap_time': s['sum'] / s['n'],
+            'last_5_avg': sum(s['last5']) / len(s['last5']) if s['n'] >= 5 else None,
+            'consistency': min(100, (1 - (s['max'] - s['min']) / s['min']) * 100)
+        }
+    
     def haversine_distance(self, lat1, lon1, lat2, lon2):
         """Calculate distance between GPS points in meters"""
         R = 6371000
@@ -54,120 +231,166 @@ class ProfessionalRacingEngine:
         return R * c
     
     def calculate_bearing(self, lat1, lon1, lat2, lon2):
-        """Calculate bearing between two points"""
-        lat1, lon1, lat2, lon2 = map(np.radians, [lat1, lon1, lat2, lon2])
-        dlon = lon2 - lon1
-        x = np.sin(dlon) * np.cos(lat2)
-        y = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dlon)
+        """Calculate bearing between two points (scalars or same-shape arrays)"""
+        phi1, phi2 = np.radians(lat1), np.radians(lat2)
+        dlon = np.radians(lon2) - np.radians(lon1)
+        cos_phi2 = np.cos(phi2)
+        x = np.sin(dlon) * cos_phi2
+        y = np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * cos_phi2 * np.cos(dlon)
         bearing = np.arctan2(x, y)
         return (np.degrees(bearing) + 360) % 360
     
+    def haversine_distance_array(self, lats, lons):
+        """Segment lengths in meters along a GPS path (len(lats) - 1 values)"""
+        phi = np.radians(lats)
+        dphi = np.radians(np.diff(lats))
+        dlambda = np.radians(np.diff(lons))
+        a = np.sin(dphi/2)**2 + np.cos(phi[:-1]) * np.cos(phi[1:]) * np.sin(dlambda/2)**2
+        return 6371000 * 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+    
     def auto_detect_sectors(self, gps_points, num_sectors=3):
         """Intelligently divide track into sectors"""
         if len(gps_points) < num_sectors * 10:
             return None
         
-        distances = []
-        for i in range(1, len(gps_points)):
-            d = self.haversine_distance(
-                gps_points[i-1][0], gps_points[i-1][1],
-                gps_points[i][0], gps_points[i][1]
-            )
-            distances.append(d)
-        
-        total_distance = sum(distances)
-        sector_length = total_distance / num_sectors
-        
-        boundaries = [0]
-        cumulative_dist = 0
-        for i, d in enumerate(distances):
-            cumulative_dist += d
-            if cumulative_dist >= sector_length * len(boundaries) and len(boundaries) < num_sectors:
+        points = np.asarray(gps_points, dtype=np.float64)
+        key = (num_sectors, points.shape, hashlib.blake2b(points.tobytes(), digest_size=16).digest())
+        boundaries = _sector_cache.get(key)
+        if boundaries is None:
+            cumulative = np.cumsum(self.haversine_distance_array(points[:, 0], points[:, 1]))
+            sector_length = cumulative[-1] / num_sectors
+            
+            # Sector k starts at the first segment where cumulative distance reaches k/num_sectors
+            targets = sector_length * np.arange(1, num_sectors)
+            boundaries = [0]
+            for i in np.searchsorted(cumulative, targets, side='left').tolist():
+                # At most one boundary per segment (a long segment can cross two targets)
+                if len(boundaries) > 1:
+                    i = max(i, boundaries[-1] + 1)
+                if i >= cumulative.size:
+                    break
                 boundaries.append(i)
-        boundaries.append(len(gps_points) - 1)
+            boundaries.append(len(gps_points) - 1)
+            
+            if len(_sector_cache) >= SECTOR_CACHE_SIZE:
+                del _sector_cache[next(iter(_sector_cache))]
+            _sector_cache[key] = boundaries
         
+        self._set_sector_boundaries(list(boundaries))
+        return self.sector_boundaries
+    
+    def _set_sector_boundaries(self, boundaries):
+        """Install sector boundaries plus the lookup array identify_sectors_batch uses"""
         self.sector_boundaries = boundaries
-        return boundaries
+        self._sector_bounds_arr = np.asarray(boundaries[1:], dtype=np.int64)
     
     def identify_sector(self, current_index):
         """Identify current sector"""
         if not self.sector_boundaries:
             return 0
-        for i, boundary in enumerate(self.sector_boundaries[1:]):
-            if current_index < boundary:
-                return i
-        return len(self.sector_boundaries) - 2
+        # Sector = boundaries after the first one that are <= index (last sector runs on)
+        sector = bisect_right(self.sector_boundaries, current_index, 1) - 1
+        return min(sector, len(self.sector_boundaries) - 2)
+    
+    def identify_sectors_batch(self, indices):
+        """identify_sector for an array of lap indices in one searchsorted call"""
+        if not self.sector_boundaries:
+            return np.zeros(len(indices), dtype=np.int64)
+        sectors = np.searchsorted(self._sector_bounds_arr, indices, side='right')
+        return np.minimum(sectors, len(self.sector_boundaries) - 2)
+    
+    def _sector_runs(self, n):
+        """
+        Start index and sector id of each sector run in a lap of n points
+        Same assignment as identify_sector(i) for every i, without the per-point loop
+        """
+        if not self.sector_boundaries:
+            return np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64)
+        
+        inner = np.asarray(self.sector_boundaries[1:-1], dtype=np.int64)
+        starts = np.concatenate(([0], inner[(inner > 0) & (inner < n)]))
+        starts = np.unique(starts)
+        return starts, np.searchsorted(inner, starts, side='right')
     
     # ========== CORNER DETECTION & ANALYSIS ==========
     
-    def detect_corners_advanced(self, lap_data):
+    def _scan_lap(self, lap):
+        """Smooth a lap's speeds and run every per-sample scan in one compiled pass"""
+        # Smooth speed data
+        if len(lap.speed) > 10:
+            smoothed_speeds = self._smooth_speeds(lap.speed)
+        else:
+            smoothed_speeds = lap.speed
+        
+        if lap.speed.size < 2:
+            none = np.empty(0, dtype=np.int64)
+            return LapScan(smoothed_speeds, lap.speed.sum(), None, 0.0, none, none, none)
+        return LapScan(smoothed_speeds, *lap_pass(lap.speed, smoothed_speeds))
+    
+    def detect_corners_advanced(self, lap, scan=None):
         """
         Advanced corner detection using GPS trajectory + speed
         Identifies: Entry, Apex, Exit for each corner
+        Input: LapArrays (+ its LapScan, when already computed)
         """
         corners = []
-        speeds = [p['speed'] for p in lap_data]
-        
-        # Smooth speed data
-        if len(speeds) > 10:
-            smoothed_speeds = savgol_filter(speeds, window_length=min(11, len(speeds)), polyorder=2)
-        else:
-            smoothed_speeds = speeds
-        
-        # Calculate trajectory curvature
-        bearings = []
-        for i in range(1, len(lap_data)):
-            bearing = self.calculate_bearing(
-                lap_data[i-1]['lat'], lap_data[i-1]['lon'],
-                lap_data[i]['lat'], lap_data[i]['lon']
-            )
-            bearings.append(bearing)
-        
-        # Detect corners (high curvature + speed drop)
-        for i in range(5, len(smoothed_speeds) - 5):
-            # Check for speed drop (corner)
-            if smoothed_speeds[i] < smoothed_speeds[i-3] and smoothed_speeds[i] < smoothed_speeds[i+3]:
-                if smoothed_speeds[i] < 40:  # Corner threshold
-                    
-                    # Analyze corner characteristics
-                    entry_speed = smoothed_speeds[i-5]
-                    apex_speed = smoothed_speeds[i]
-                    exit_speed = smoothed_speeds[i+5]
-                    
-                    # Calculate corner severity
-                    speed_loss = entry_speed - apex_speed
-                    corner_severity = speed_loss / entry_speed if entry_speed > 0 else 0
-                    
-                    # Calculate exit acceleration
-                    exit_acceleration = exit_speed - apex_speed
-                    
-                    corner = {
-                        'index': i,
-                        'lat': lap_data[i]['lat'],
-                        'lon': lap_data[i]['lon'],
-                        'entry_speed': round(entry_speed, 1),
-                        'apex_speed': round(apex_speed, 1),
-                        'exit_speed': round(exit_speed, 1),
-                        'speed_loss': round(speed_loss, 1),
-                        'severity': round(corner_severity * 100, 1),
-                        'exit_acceleration': round(exit_acceleration, 1),
-                        'type': self._classify_corner(corner_severity, apex_speed)
-                    }
-                    
-                    corners.append(corner)
+        if scan is None:
+            scan = self._scan_lap(lap)
+        smoothed_speeds = scan.smoothed
+        
+        # Detect corners (speed drop below 40 km/h), found by the lap scan
+        idx = scan.corners
+        
+        # Analyze corner characteristics for every corner at once
+        entry_speed = smoothed_speeds[idx - 5]
+        apex_speed = smoothed_speeds[idx]
+        exit_speed = smoothed_speeds[idx + 5]
+        
+        # Calculate corner severity
+        speed_loss = entry_speed - apex_speed
+        corner_severity = np.divide(speed_loss, entry_speed, out=np.zeros_like(speed_loss), where=entry_speed > 0)
+        
+        # Calculate exit acceleration
+        exit_acceleration = exit_speed - apex_speed
+        
+        types = self._classify_corners(corner_severity, apex_speed)
+        
+        # Round each column in one call, then only assemble dicts per corner
+        rounded = np.round([entry_speed, apex_speed, exit_speed, speed_loss,
+                            corner_severity * 100, exit_acceleration], 1)
+        for i, lat, lon, entry, apex, exit_, loss, severity, exit_accel, corner_type in zip(
+                idx.tolist(), lap.lat[idx].tolist(), lap.lon[idx].tolist(), *rounded, types):
+            corners.append({
+                'index': i,
+                'lat': lat,
+                'lon': lon,
+                'entry_speed': entry,
+                'apex_speed': apex,
+                'exit_speed': exit_,
+                'speed_loss': loss,
+                'severity': severity,
+                'exit_acceleration': exit_accel,
+                'type': corner_type
+            })
         
         return corners
     
-    def _classify_corner(self, severity, apex_speed):
-        """Classify corner type"""
-        if severity > 0.5:
-            return "HAIRPIN"
-        elif severity > 0.3:
-            return "SLOW"
-        elif apex_speed > 35:
-            return "FAST"
-        else:
-            return "MEDIUM"
+    def _smooth_speeds(self, speeds):
+        """
+        Same result as savgol_filter(speeds, 11, 2) for len(speeds) >= 11
+        FIR convolution with the precomputed coefficients + fixed edge fits
+        """
+        half = SG_WINDOW // 2
+        smoothed = np.convolve(speeds, SG_COEFFS, mode='same')
+        smoothed[:half] = SG_HEAD @ speeds[:SG_WINDOW]
+        smoothed[-half:] = SG_TAIL @ speeds[-SG_WINDOW:]
+        return smoothed
+    
+    def _classify_corners(self, severity, apex_speed):
+        """Classify corner types for arrays of corners (labels in corner order)"""
+        # Row: severity above 0.3 / 0.5, column: apex above 35 km/h
+        type_ids = 2 * ((severity > 0.3).astype(np.intp) + (severity > 0.5)) + (apex_speed > 35)
+        return CORNER_TYPE_TABLE[type_ids].tolist()
     
     def analyze_corner_performance(self, corners, lap_number):
         """
@@ -184,7 +407,7 @@ class ProfessionalRacingEngine:
             performance_score = (corner['exit_acceleration'] * 2) - corner['speed_loss']
             
             # Store corner data for ML comparison
-            self.corner_data[corner_id].append({
+            best = self._record_corner(corner_id, {
                 'lap': lap_number,
                 'performance_score': performance_score,
                 'entry_speed': corner['entry_speed'],
@@ -195,8 +418,7 @@ class ProfessionalRacingEngine:
             
             # Compare to historical best
             if len(self.corner_data[corner_id]) > 1:
-                all_scores = [c['performance_score'] for c in self.corner_data[corner_id]]
-                best_score = max(all_scores)
+                best_score = best['score']
                 current_score = performance_score
                 
                 improvement_potential = ((best_score - current_score) / abs(best_score)) * 100 if best_score != 0 else 0
@@ -207,17 +429,39 @@ class ProfessionalRacingEngine:
                         'corner_number': idx + 1,
                         'improvement_potential': round(improvement_potential, 1),
                         'current_exit': corner['exit_speed'],
-                        'best_exit': max([c['exit_speed'] for c in self.corner_data[corner_id]]),
-                        'recommendation': self._get_corner_recommendation(corner, self.corner_data[corner_id]),
+                        'best_exit': best['exit_corner']['exit_speed'],
+                        'recommendation': self._get_corner_recommendation(corner, best['exit_corner']),
                         'location': (corner['lat'], corner['lon'])
                     })
         
         return corner_analysis
     
-    def _get_corner_recommendation(self, current_corner, historical_data):
-        """Generate corner-specific coaching"""
-        best_corner = max(historical_data, key=lambda x: x['exit_speed'])
-        
+    def _record_corner(self, corner_id, record):
+        """Append a corner pass to its history and fold it into the running bests"""
+        self.corner_data[corner_id].append(record)
+        
+        best = self.corner_best.get(corner_id)
+        if best is None:
+            best = self.corner_best[corner_id] = {'score': record['performance_score'], 'exit_corner': record}
+            return best
+        
+        best['score'] = max(best['score'], record['performance_score'])
+        # Strictly faster only: earliest pass wins ties, like max() over the history
+        if record['exit_speed'] > best['exit_corner']['exit_speed']:
+            best['exit_corner'] = record
+        return best
+    
+    def _rebuild_corner_best(self):
+        """Recompute running bests from corner_data (after a session load)"""
+        history = self.corner_data
+        self.corner_data = defaultdict(partial(deque, maxlen=CORNER_HISTORY))
+        self.corner_best = {}
+        for corner_id, passes in history.items():
+            for record in passes:
+                self._record_corner(corner_id, record)
+    
+    def _get_corner_recommendation(self, current_corner, best_corner):
+        """Generate corner-specific coaching against the best-exit pass"""
         entry_diff = current_corner['entry_speed'] - best_corner['entry_speed']
         exit_diff = current_corner['exit_speed'] - best_corner['exit_speed']
         
@@ -232,75 +476,103 @@ class ProfessionalRacingEngine:
     
     # ========== BRAKE & ACCELERATION ZONES ==========
     
-    def detect_brake_zones(self, lap_data):
-        """Detect all braking zones with precision"""
-        brake_zones = []
-        speeds = [p['speed'] for p in lap_data]
+    def detect_brake_zones(self, lap, scan=None):
+        """Detect all braking zones with precision (input: LapArrays [+ LapScan])"""
+        # Braking detected: > 3 km/h lost since the previous sample
+        idx = (scan or self._scan_lap(lap)).brakes
+        before = lap.speed[idx - 1].tolist()
+        after = lap.speed[idx].tolist()
         
-        for i in range(1, len(speeds) - 1):
-            deceleration = speeds[i-1] - speeds[i]
-            
-            if deceleration > 3:  # Braking detected
-                brake_zones.append({
-                    'index': i,
-                    'lat': lap_data[i]['lat'],
-                    'lon': lap_data[i]['lon'],
-                    'speed_before': speeds[i-1],
-                    'speed_after': speeds[i],
-                    'deceleration_rate': round(deceleration, 2),
-                    'brake_intensity': 'HARD' if deceleration > 10 else 'MODERATE'
-                })
+        brake_zones = []
+        for i, lat, lon, v0, v1 in zip(idx.tolist(), lap.lat[idx].tolist(), lap.lon[idx].tolist(), before, after):
+            deceleration = v0 - v1
+            brake_zones.append({
+                'index': i,
+                'lat': lat,
+                'lon': lon,
+                'speed_before': v0,
+                'speed_after': v1,
+                'deceleration_rate': round(deceleration, 2),
+                'brake_intensity': 'HARD' if deceleration > 10 else 'MODERATE'
+            })
         
         return brake_zones
     
-    def detect_acceleration_zones(self, lap_data):
-        """Detect acceleration zones (corner exits, straights)"""
-        accel_zones = []
-        speeds = [p['speed'] for p in lap_data]
+    def detect_acceleration_zones(self, lap, scan=None):
+        """Detect acceleration zones (corner exits, straights), input: LapArrays [+ LapScan]"""
+        # Acceleration detected: > 2 km/h gained since the previous sample
+        idx = (scan or self._scan_lap(lap)).accels
+        before = lap.speed[idx - 1].tolist()
+        after = lap.speed[idx].tolist()
         
-        for i in range(1, len(speeds) - 1):
-            acceleration = speeds[i] - speeds[i-1]
-            
-            if acceleration > 2:  # Acceleration detected
-                accel_zones.append({
-                    'index': i,
-                    'lat': lap_data[i]['lat'],
-                    'lon': lap_data[i]['lon'],
-                    'speed_before': speeds[i-1],
-                    'speed_after': speeds[i],
-                    'acceleration_rate': round(acceleration, 2),
-                    'zone_type': 'CORNER_EXIT' if speeds[i-1] < 30 else 'STRAIGHT'
-                })
+        accel_zones = []
+        for i, lat, lon, v0, v1 in zip(idx.tolist(), lap.lat[idx].tolist(), lap.lon[idx].tolist(), before, after):
+            acceleration = v1 - v0
+            accel_zones.append({
+                'index': i,
+                'lat': lat,
+                'lon': lon,
+                'speed_before': v0,
+                'speed_after': v1,
+                'acceleration_rate': round(acceleration, 2),
+                'zone_type': 'CORNER_EXIT' if v0 < 30 else 'STRAIGHT'
+            })
         
         return accel_zones
     
+    def _project_m(self, latlon):
+        """
+        Equirectangular (y, x) in meters around the session's reference latitude
+        Matches haversine to ~1e-5 relative over a kart track, with no trig per point
+        """
+        if self._lat0_cos is None:
+            self._lat0_cos = np.cos(np.radians(latlon[0, 0]))
+        xy = np.radians(latlon) * 6371000
+        xy[:, 1] *= self._lat0_cos
+        return xy
+    
+    def _brake_zone_tree(self):
+        """
+        KD-tree over historical brake zones (projected), built once per change
+        Returned with a list snapshot of the zones: tree indices into the deque are O(n)
+        """
+        if self._brake_tree is None:
+            zones = list(self.brake_zones)
+            hist = np.array([(bz['lat'], bz['lon']) for bz in zones])
+            self._brake_tree = (cKDTree(self._project_m(hist)), zones)
+        return self._brake_tree
+    
     def optimize_brake_points(self, current_brake_zones):
         """Compare current braking to optimal braking"""
         if not self.brake_zones:
             return {}
         
         optimizations = []
+        if not current_brake_zones:
+            return optimizations
+        
+        cur = np.array([(bz['lat'], bz['lon']) for bz in current_brake_zones])
+        # Same brake zone = under 10 m apart (query radius is inclusive)
+        tree, zones = self._brake_zone_tree()
+        matches = tree.query_ball_point(
+            self._project_m(cur), r=np.nextafter(10.0, 0), return_sorted=True
+        )
         
-        for current_bz in current_brake_zones:
-            # Find closest historical brake zone
-            for optimal_bz in self.brake_zones:
-                distance = self.haversine_distance(
-                    current_bz['lat'], current_bz['lon'],
-                    optimal_bz['lat'], optimal_bz['lon']
-                )
+        for c, hits in enumerate(matches):
+            current_bz = current_brake_zones[c]
+            for o in hits:
+                optimal_bz = zones[o]
+                speed_diff = optimal_bz['speed_before'] - current_bz['speed_before']
                 
-                if distance < 10:  # Same brake zone
-                    speed_diff = optimal_bz['speed_before'] - current_bz['speed_before']
-                    
-                    if abs(speed_diff) > 2:
-                        optimizations.append({
-                            'location': (current_bz['lat'], current_bz['lon']),
-                            'current_entry': current_bz['speed_before'],
-                            'optimal_entry': optimal_bz['speed_before'],
-                            'brake_earlier': speed_diff > 0,
-                            'time_gain_potential': abs(speed_diff) * 0.05,  # Rough estimate
-                            'recommendation': f"{'Brake earlier' if speed_diff > 0 else 'Brake later'} by ~{abs(speed_diff):.0f} km/h"
-                        })
+                if abs(speed_diff) > 2:
+                    optimizations.append({
+                        'location': (current_bz['lat'], current_bz['lon']),
+                        'current_entry': current_bz['speed_before'],
+                        'optimal_entry': optimal_bz['speed_before'],
+                        'brake_earlier': speed_diff > 0,
+                        'time_gain_potential': abs(speed_diff) * 0.05,  # Rough estimate
+                        'recommendation': f"{'Brake earlier' if speed_diff > 0 else 'Brake later'} by ~{abs(speed_diff):.0f} km/h"
+                    })
         
         return optimizations
     
@@ -326,9 +598,13 @@ class ProfessionalRacingEngine:
         avg_speeds = [lap['avg_speed'] for lap in recent_laps]
         
         # Linear regression for speed degradation
+        # Closed-form least-squares slope on centered data (<= 10 points, no SVD)
         if len(avg_speeds) >= 3:
-            coeffs = np.polyfit(lap_numbers, avg_speeds, 1)
-            degradation_rate = abs(coeffs[0])  # Speed loss per lap
+            x = np.asarray(lap_numbers, dtype=np.float64)
+            y = np.asarray(avg_speeds, dtype=np.float64)
+            dx = x - x.mean()
+            slope = (dx @ (y - y.mean())) / (dx @ dx)
+            degradation_rate = abs(slope)  # Speed loss per lap
         else:
             degradation_rate = 0
         
@@ -364,16 +640,7 @@ class ProfessionalRacingEngine:
     
     def _get_tire_status(self, grip):
         """Tire condition status"""
-        if grip >= 95:
-            return "EXCELLENT"
-        elif grip >= 85:
-            return "GOOD"
-        elif grip >= 75:
-            return "FAIR"
-        elif grip >= 65:
-            return "WORN"
-        else:
-            return "CRITICAL"
+        return TIRE_STATUS_LABELS[bisect_right(TIRE_GRIP_THRESHOLDS, grip)]
     
     # ========== DRIVER PERFORMANCE SCORING ==========
     
@@ -385,25 +652,23 @@ class ProfessionalRacingEngine:
         if len(self.lap_history) < 2:
             return {'overall_score': 75, 'rating': 'B', 'status': 'INSUFFICIENT_DATA'}
         
-        recent_laps = self.lap_history[-min(10, len(self.lap_history)):]
-        
         # === 1. SPEED SCORE (40%) ===
-        lap_times = [lap['total_time'] for lap in recent_laps]
-        best_time = min(lap_times)
+        lap_times = self.lap_times()[-10:]
+        best_time = lap_times.min()
         current_time = lap_info['total_time']
         
         speed_score = max(0, 100 - ((current_time - best_time) / best_time) * 100)
         
         # === 2. CONSISTENCY SCORE (30%) ===
-        time_std = np.std(lap_times)
+        time_std = lap_times.std()
         consistency_score = max(0, 100 - (time_std * 10))
         
         # === 3. SMOOTHNESS SCORE (30%) ===
         # Measure speed variance within lap
-        lap_speeds = [p['speed'] for p in self.current_lap_data]
-        if lap_speeds:
-            speed_changes = [abs(lap_speeds[i] - lap_speeds[i-1]) for i in range(1, len(lap_speeds))]
-            avg_change = np.mean(speed_changes) if speed_changes else 0
+        # Mean absolute speed step (step sum comes from the lap scan)
+        lap_speeds = self.current_lap_data.speed
+        if lap_speeds.size:
+            avg_change = self.current_lap_scan.abs_step_sum / (lap_speeds.size - 1) if lap_speeds.size > 1 else 0
             smoothness_score = max(0, 100 - (avg_change * 5))
         else:
             smoothness_score = 75
@@ -426,29 +691,15 @@ class ProfessionalRacingEngine:
     
     def _get_performance_rating(self, score):
         """Convert score to letter grade"""
-        if score >= 95:
-            return 'S+'
-        elif score >= 90:
-            return 'S'
-        elif score >= 85:
-            return 'A+'
-        elif score >= 80:
-            return 'A'
-        elif score >= 75:
-            return 'B+'
-        elif score >= 70:
-            return 'B'
-        elif score >= 60:
-            return 'C'
-        else:
-            return 'D'
+        return RATING_LABELS[bisect_right(RATING_THRESHOLDS, score)]
     
     def _calculate_performance_trend(self):
         """Calculate if driver is improving or declining"""
         if len(self.driver_performance_metrics) < 3:
             return 'STABLE'
         
-        recent_scores = [m['overall_score'] for m in self.driver_performance_metrics[-5:]]
+        metrics = self.driver_performance_metrics
+        recent_scores = [m['overall_score'] for m in islice(metrics, max(0, len(metrics) - 5), None)]
         
         if len(recent_scores) >= 3:
             trend = recent_scores[-1] - recent_scores[0]
@@ -506,7 +757,7 @@ class ProfessionalRacingEngine:
         
         # === PACE ANALYSIS ===
         if len(self.lap_history) >= 5:
-            recent_times = [lap['total_time'] for lap in self.lap_history[-5:]]
+            recent_times = self.lap_times()[-5:]
             pace_trend = recent_times[-1] - recent_times[0]
             
             if pace_trend > 1.0:  # Slowing significantly
@@ -602,49 +853,49 @@ class ProfessionalRacingEngine:
     
     def _get_race_phase(self, progress):
         """Determine current race phase"""
-        if progress < 0.25:
-            return "OPENING"
-        elif progress < 0.5:
-            return "EARLY"
-        elif progress < 0.75:
-            return "MIDDLE"
-        else:
-            return "CLOSING"
+        return RACE_PHASE_LABELS[bisect_right(RACE_PHASE_THRESHOLDS, progress)]
     
     # ========== OVERTAKING OPPORTUNITIES ==========
     
-    def detect_overtaking_zones(self, lap_data):
+    def detect_overtaking_zones(self, lap):
         """
         Identify optimal overtaking opportunities
         Based on: High-speed sections, post-corner acceleration zones
+        Input: LapArrays
         """
         overtaking_zones = []
-        speeds = [p['speed'] for p in lap_data]
+        speeds = lap.speed
+        n = speeds.size
         
         # Find high-speed sections (good for drafting/overtaking)
-        for i in range(5, len(speeds) - 5):
-            avg_speed = np.mean(speeds[i-5:i+5])
-            
-            if avg_speed > 50:  # High-speed zone
+        # 10-sample mean over [i-5, i+5) for every i in one strided reduction
+        if n > 10:
+            rolling = sliding_window_view(speeds, 10).mean(axis=1)[:n - 10]
+            idx = np.flatnonzero(rolling > 50)  # High-speed zone
+            for i, lat, lon, avg_speed in zip((idx + 5).tolist(), lap.lat[idx + 5].tolist(),
+                                              lap.lon[idx + 5].tolist(), np.round(rolling[idx], 1)):
                 overtaking_zones.append({
                     'index': i,
-                    'lat': lap_data[i]['lat'],
-                    'lon': lap_data[i]['lon'],
+                    'lat': lat,
+                    'lon': lon,
                     'type': 'HIGH_SPEED_STRAIGHT',
-                    'avg_speed': round(avg_speed, 1),
+                    'avg_speed': avg_speed,
                     'confidence': 0.85,
                     'recommendation': 'Use slipstream for overtake'
                 })
         
-        # Find corner exits (acceleration zones)
-        for i in range(1, len(speeds) - 5):
-            if speeds[i] < 35 and speeds[i+5] > speeds[i] + 10:  # Corner exit
+        # Find corner exits (acceleration zones): slow now, 10+ km/h faster 5 samples later
+        if n > 6:
+            now, later = speeds[1:-5], speeds[6:]
+            idx = np.flatnonzero((now < 35) & (later > now + 10)) + 1
+            for i, lat, lon, exit_speed in zip(idx.tolist(), lap.lat[idx].tolist(),
+                                               lap.lon[idx].tolist(), speeds[idx + 5].tolist()):
                 overtaking_zones.append({
                     'index': i,
-                    'lat': lap_data[i]['lat'],
-                    'lon': lap_data[i]['lon'],
+                    'lat': lat,
+                    'lon': lon,
                     'type': 'CORNER_EXIT',
-                    'exit_speed': speeds[i+5],
+                    'exit_speed': exit_speed,
                     'confidence': 0.70,
                     'recommendation': 'Better exit = overtake next straight'
                 })
@@ -657,50 +908,61 @@ class ProfessionalRacingEngine:
     def process_lap(self, lap_data):
         """
         Complete lap processing with all advanced features
-        Input: List of {timestamp, lat, lon, speed}
+        Input: List of {timestamp, lat, lon, speed} or LapArrays
         """
-        if len(lap_data) < 10:
+        # Column arrays extracted once, shared by every detector below
+        lap = lap_arrays(lap_data)
+        n = len(lap.ts)
+        if n < 10:
             return None
         
         # Auto-detect sectors on first lap
-        gps_points = [(d['lat'], d['lon']) for d in lap_data]
         if not self.sector_boundaries:
-            self.auto_detect_sectors(gps_points)
+            self.auto_detect_sectors(np.column_stack((lap.lat, lap.lon)))
         
         # === SECTOR ANALYSIS ===
         sector_times = {}
-        sector_data = defaultdict(list)
-        
-        for i, point in enumerate(lap_data):
-            sector_id = self.identify_sector(i)
-            sector_data[sector_id].append(point)
-        
-        for sector_id, points in sector_data.items():
-            if len(points) >= 2:
-                sector_times[sector_id] = {
-                    'time': points[-1]['timestamp'] - points[0]['timestamp'],
-                    'data': points,
-                    'avg_speed': np.mean([p['speed'] for p in points]),
-                    'max_speed': max([p['speed'] for p in points]),
-                    'min_speed': min([p['speed'] for p in points])
-                }
+        
+        # Sectors are contiguous index runs: reduce each run in one C pass per stat
+        starts, sector_ids = self._sector_runs(n)
+        stops = np.append(starts[1:], n)
+        counts = stops - starts
+        sums = np.add.reduceat(lap.speed, starts)
+        maxs = np.maximum.reduceat(lap.speed, starts)
+        mins = np.minimum.reduceat(lap.speed, starts)
+        times = lap.ts[stops - 1] - lap.ts[starts]
+        
+        # Dicts only for the few sectors (the API and optimal lap consume them)
+        for k in np.flatnonzero(counts >= 2).tolist():
+            start, stop = starts[k].item(), stops[k].item()
+            sector_times[sector_ids[k].item()] = {
+                'time': times[k].item(),
+                'data': sector_columns(lap, start, stop),
+                'avg_speed': sums[k] / counts[k],
+                'max_speed': maxs[k].item(),
+                'min_speed': mins[k].item()
+            }
+        
+        # Lap scalars and corner/brake/accel samples from one compiled sweep
+        scan = self._scan_lap(lap)
         
         lap_number = len(self.lap_history) + 1
-        lap_total_time = lap_data[-1]['timestamp'] - lap_data[0]['timestamp']
-        avg_speed = np.mean([p['speed'] for p in lap_data])
-        max_speed = max([p['speed'] for p in lap_data])
+        lap_total_time = (lap.ts[-1] - lap.ts[0]).item()
+        avg_speed = scan.speed_sum / n
+        max_speed = scan.max_speed
         
         # === ADVANCED ANALYSIS ===
-        corners = self.detect_corners_advanced(lap_data)
+        corners = self.detect_corners_advanced(lap, scan)
         corner_analysis = self.analyze_corner_performance(corners, lap_number)
-        brake_zones = self.detect_brake_zones(lap_data)
-        accel_zones = self.detect_acceleration_zones(lap_data)
+        brake_zones = self.detect_brake_zones(lap, scan)
+        accel_zones = self.detect_acceleration_zones(lap, scan)
         brake_optimization = self.optimize_brake_points(brake_zones)
         tire_status = self.predict_tire_degradation(lap_number, avg_speed)
-        overtaking_zones = self.detect_overtaking_zones(lap_data)
+        overtaking_zones = self.detect_overtaking_zones(lap)
         
         # Store current lap data for smoothness calculation
-        self.current_lap_data = lap_data
+        self.current_lap_data = lap
+        self.current_lap_scan = scan
         
         # === COMPILE LAP INFO ===
         lap_info = {
@@ -726,22 +988,25 @@ class ProfessionalRacingEngine:
             lap_info['performance'] = self.calculate_driver_performance(lap_info)
         
         self.lap_history.append(lap_info)
+        self._update_lap_stats(lap_info)
         self.update_optimal_lap(lap_info)
         
         # Update brake zones history
         if brake_zones:
             self.brake_zones.extend(brake_zones)
+            self._brake_tree = None
         
+        self.revision += 1
         return lap_info
     
     def update_optimal_lap(self, new_lap_info):
         """Update optimal lap with best sectors"""
         updated_sectors = []
+        best_times = self._grow_best_sector_times(max(new_lap_info['sectors'], default=-1) + 1)
         
         for sector_id, sector_data in new_lap_info['sectors'].items():
-            current_best = self.optimal_lap.get(sector_id, {}).get('time', float('inf'))
-            
-            if sector_data['time'] < current_best:
+            if sector_data['time'] < best_times[sector_id]:
+                best_times[sector_id] = sector_data['time']
                 self.optimal_lap[sector_id] = {
                     'time': sector_data['time'],
                     'data': sector_data['data'],
@@ -749,81 +1014,121 @@ class ProfessionalRacingEngine:
                     'avg_speed': sector_data['avg_speed'],
                     'max_speed': sector_data['max_speed']
                 }
+                ts = sector_data['data']['timestamp']
+                self._optimal_elapsed[sector_id] = ts - ts[0]
                 updated_sectors.append(sector_id)
         
+        if updated_sectors:
+            self._refresh_optimal_total()
         return updated_sectors
     
+    def _grow_best_sector_times(self, size):
+        """Best-time array covering sector ids below size (new slots start at inf)"""
+        best_times = self._best_sector_times
+        if best_times.size < size:
+            best_times = np.append(best_times, np.full(size - best_times.size, np.inf))
+            self._best_sector_times = best_times
+        return best_times
+    
+    def _refresh_optimal_total(self):
+        """Re-sum the optimal sector times (only when a sector improves)"""
+        self._optimal_total_time = sum(sector['time'] for sector in self.optimal_lap.values())
+        self._optimal_revision += 1
+    
     def get_optimal_lap_time(self):
-        """Calculate theoretical optimal lap time"""
+        """Calculate theoretical optimal lap time (same dict until the optimal or best lap changes)"""
         if not self.optimal_lap:
             return None
         
-        total_time = sum(sector['time'] for sector in self.optimal_lap.values())
-        return {
-            'optimal_time': total_time,
-            'sectors': self.optimal_lap,
-            'improvement_potential': self.calculate_improvement_potential()
-        }
+        revision, cached = self._optimal_time_cache
+        if revision != self._optimal_revision:
+            cached = {
+                'optimal_time': self._optimal_total_time,
+                'sectors': self.optimal_lap,
+                'improvement_potential': self.calculate_improvement_potential()
+            }
+            self._optimal_time_cache = (self._optimal_revision, cached)
+        return cached
     
     def calculate_improvement_potential(self):
-        """Calculate potential time gain"""
-        if not self.lap_history:
+        """Calculate potential time gain (best lap vs optimal, both tracked incrementally)"""
+        fastest_lap = self.lap_stats['best']
+        if fastest_lap is None:
             return 0
         
-        fastest_lap = min(self.lap_history, key=lambda x: x['total_time'])
-        optimal_time = sum(sector['time'] for sector in self.optimal_lap.values())
-        
-        return fastest_lap['total_time'] - optimal_time
+        return fastest_lap['total_time'] - self._optimal_total_time
     
     def calculate_real_time_delta(self, current_position, current_sector, elapsed_time):
         """Real-time delta vs optimal lap"""
-        if current_sector not in self.optimal_lap:
+        optimal_elapsed = self._optimal_elapsed.get(current_sector)
+        if optimal_elapsed is None:
             return 0
         
-        optimal_sector_data = self.optimal_lap[current_sector]['data']
-        optimal_position_index = min(
-            int((current_position / len(optimal_sector_data)) * len(optimal_sector_data)),
-            len(optimal_sector_data) - 1
-        )
-        
-        optimal_elapsed = optimal_sector_data[optimal_position_index]['timestamp'] - optimal_sector_data[0]['timestamp']
-        return optimal_elapsed - elapsed_time
+        optimal_position_index = min(int(current_position), len(optimal_elapsed) - 1)
+        return optimal_elapsed[optimal_position_index].item() - elapsed_time
+    
+    def fold_sector_times(self, sector_accum, timestamps, start=0):
+        """
+        Fold timestamps[start:] (indices within the current lap) into a sector accumulator
+        sector_accum: sector_id -> [first timestamp, last timestamp, point count]
+        """
+        n = len(timestamps)
+        if start >= n:
+            return
+        
+        # Sector ids never decrease along a lap: fold each run of equal ids at once
+        sectors = self.identify_sectors_batch(np.arange(start, n))
+        run_starts = np.flatnonzero(np.diff(sectors)) + 1
+        for first, stop in zip([0, *run_starts.tolist()], [*run_starts.tolist(), n - start]):
+            sector_id = sectors[first].item()
+            t_first = timestamps[start + first].item()
+            t_last = timestamps[start + stop - 1].item()
+            acc = sector_accum.get(sector_id)
+            if acc is None:
+                sector_accum[sector_id] = [t_first, t_last, stop - first]
+            else:
+                acc[1] = t_last
+                acc[2] += stop - first
     
     def predict_lap_time(self, current_lap_data, current_sector):
         """ML-based lap time prediction"""
         if len(self.lap_history) < 3:
             return None
         
-        completed_sectors = list(range(current_sector + 1))
-        current_sector_times = []
+        sector_accum = {}
+        self.fold_sector_times(sector_accum, lap_arrays(current_lap_data).ts)
+        return self.predict_lap_time_fast(sector_accum, current_sector)
+    
+    def predict_lap_time_fast(self, sector_accum, current_sector):
+        """Lap time prediction from a sector accumulator kept up to date by the caller"""
+        if len(self.lap_history) < 3:
+            return None
         
-        for sector_id in completed_sectors:
-            sector_points = [p for i, p in enumerate(current_lap_data) 
-                           if self.identify_sector(i) == sector_id]
-            if len(sector_points) >= 2:
-                sector_time = sector_points[-1]['timestamp'] - sector_points[0]['timestamp']
-                current_sector_times.append(sector_time)
+        sector_ids, current_sector_times = [], []
+        for sector_id in range(current_sector + 1):
+            acc = sector_accum.get(sector_id)
+            if acc is not None and acc[2] >= 2:
+                sector_ids.append(sector_id)
+                current_sector_times.append(acc[1] - acc[0])
         
-        # Build training data
-        X, y = [], []
-        for lap in self.lap_history:
-            early_times = [lap['sectors'][sid]['time'] for sid in completed_sectors 
-                          if sid in lap['sectors']]
-            if len(early_times) == len(completed_sectors):
-                X.append(early_times)
-                y.append(lap['total_time'])
+        # Training data: past laps with a time for every sector timed so far
+        n = self.lap_stats['n']
+        if not sector_ids or sector_ids[-1] >= self._lap_sector_times.shape[1]:
+            return None
+        X = self._lap_sector_times[:n, sector_ids]
+        complete = ~np.isnan(X).any(axis=1)
+        X = X[complete]
+        y = self.lap_times()[complete]
         
         if len(X) < 2:
             return None
         
-        X = np.array(X)
-        y = np.array(y)
         current_times = np.array(current_sector_times)
         
         # Weighted prediction based on similarity
         similarities = 1 / (1 + np.abs(X - current_times).sum(axis=1))
         weights = similarities / similarities.sum()
-        predicted_time = np.sum(weights * y)
+        predicted_time = weights @ y
         
         return {
             'predicted_lap_time': predicted_time,
@@ -832,11 +1137,26 @@ class ProfessionalRacingEngine:
         }
     
     def get_racing_line(self):
-        """Extract optimal racing line from best sectors"""
-        racing_line = []
-        for sector_id in sorted(self.optimal_lap.keys()):
-            racing_line.extend([(p['lat'], p['lon']) for p in self.optimal_lap[sector_id]['data']])
-        return racing_line
+        """Extract optimal racing line from best sectors (cached like get_optimal_lap_time)"""
+        return self._racing_line()[1]
+    
+    def get_racing_line_array(self):
+        """Optimal racing line as an (N, 2) lat/lon array (same cache as get_racing_line)"""
+        return self._racing_line()[0]
+    
+    def _racing_line(self):
+        """(array, list) racing line, stacked from the optimal sectors' columns once per change"""
+        if self._racing_line_cache[0] == self._optimal_revision:
+            return self._racing_line_cache[1:]
+        
+        sectors = [self.optimal_lap[sector_id]['data'] for sector_id in sorted(self.optimal_lap)]
+        if sectors:
+            line = np.column_stack((np.concatenate([data['lat'] for data in sectors]),
+                                    np.concatenate([data['lon'] for data in sectors])))
+        else:
+            line = np.empty((0, 2))
+        self._racing_line_cache = (self._optimal_revision, line, line.tolist())
+        return self._racing_line_cache[1:]
     
     def identify_improvement_zones(self):
         """Identify sectors with most time loss"""
@@ -860,79 +1180,194 @@ class ProfessionalRacingEngine:
         return dict(sorted(improvement_zones.items(), key=lambda x: x[1]['time_loss'], reverse=True))
     
     def save_session(self, filename=None):
-        """Save complete session data"""
+        """
+        Save complete session data
+        Snapshots the session here and writes the files in the background; returns the .pkl path
+        """
+        now = datetime.now()  # One instant for the filename, date and duration
         if not filename:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            timestamp = now.strftime('%Y%m%d_%H%M%S')
             filename = f'sessions/racing_session_{timestamp}.pkl'
         
         os.makedirs('sessions', exist_ok=True)
         
+        # Shallow copies: laps keep being appended while the writer runs
+        best_lap = self.lap_stats['best']
         session_data = {
-            'lap_history': self.lap_history,
-            'optimal_lap': self.optimal_lap,
+            'lap_history': list(self.lap_history),
+            'optimal_lap': dict(self.optimal_lap),
             'sector_boundaries': self.sector_boundaries,
-            'corner_data': dict(self.corner_data),
-            'brake_zones': self.brake_zones,
-            'tire_degradation_history': self.tire_degradation_history,
-            'driver_performance_metrics': self.driver_performance_metrics,
-            'race_strategy_log': self.race_strategy_log,
+            'corner_data': {corner_id: passes.copy() for corner_id, passes in self.corner_data.items()},
+            'brake_zones': self.brake_zones.copy(),
+            'tire_degradation_history': self.tire_degradation_history.copy(),
+            'driver_performance_metrics': self.driver_performance_metrics.copy(),
+            'race_strategy_log': self.race_strategy_log.copy(),
             'overtaking_opportunities': self.overtaking_opportunities,
             'session_metadata': {
-                'date': datetime.now().isoformat(),
-                'duration': str(datetime.now() - self.session_start_time),
+                'date': now.isoformat(),
+                'duration': str(now - self.session_start_time),
                 'total_laps': len(self.lap_history),
-                'best_lap_time': min([l['total_time'] for l in self.lap_history]) if self.lap_history else None,
-                'best_lap_number': min(self.lap_history, key=lambda x: x['total_time'])['lap_number'] if self.lap_history else None
+                'best_lap_time': best_lap['total_time'] if best_lap else None,
+                'best_lap_number': best_lap['lap_number'] if best_lap else None
             }
         }
         
-        with open(filename, 'wb') as f:
-            pickle.dump(session_data, f)
+        self._pending_save = self._io_pool.submit(self._write_session_logged, session_data, filename)
+        return filename
+    
+    def wait_for_save(self):
+        """Block until the last save_session has finished writing (errors land in last_save_error)"""
+        if self._pending_save is not None:
+            self._pending_save.result()
+    
+    def _write_session_logged(self, session_data, filename):
+        """Background save job: nobody awaits it, so failures are logged and kept here"""
+        try:
+            self._write_session(session_data, filename)
+        except Exception as e:
+            self.last_save_error = f"{type(e).__name__}: {e}"
+            logger.exception("Session save failed: %s", filename)
+        else:
+            self.last_save_error = None
+    
+    def _write_session(self, session_data, filename):
+        """Write the pickle and its JSON twin, each via a temp file and atomic rename"""
+        tmp = filename + '.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(session_data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, filename)
         
         # Also save JSON version for easy viewing
         json_filename = filename.replace('.pkl', '.json')
-        with open(json_filename, 'w') as f:
-            # Convert numpy types to Python types for JSON
-            json_safe_data = json.loads(json.dumps(session_data, default=str))
-            json.dump(json_safe_data, f, indent=2)
-        
-        return filename
+        tmp = json_filename + '.tmp'
+        with open(tmp, 'wb') as f:
+            # One pass: numpy arrays/scalars natively, deques and the rest via json_default
+            f.write(orjson.dumps(session_data, default=json_default, option=SESSION_JSON_OPTIONS))
+        os.replace(tmp, json_filename)
     
     def load_session(self, filename):
         """Load previous session"""
+        self.wait_for_save()  # A save still being written may be the file asked for
         with open(filename, 'rb') as f:
             session_data = pickle.load(f)
         
         self.lap_history = session_data.get('lap_history', [])
         self.optimal_lap = session_data.get('optimal_lap', {})
-        self.sector_boundaries = session_data.get('sector_boundaries', [])
-        self.corner_data = defaultdict(list, session_data.get('corner_data', {}))
-        self.brake_zones = session_data.get('brake_zones', [])
-        self.tire_degradation_history = session_data.get('tire_degradation_history', [])
-        self.driver_performance_metrics = session_data.get('driver_performance_metrics', [])
-        self.race_strategy_log = session_data.get('race_strategy_log', [])
+        for sectors in [lap['sectors'] for lap in self.lap_history] + [self.optimal_lap]:
+            for sector in sectors.values():
+                sector['data'] = columns_from_points(sector['data'])
+        self._best_sector_times = np.empty(0)
+        best_times = self._grow_best_sector_times(max(self.optimal_lap, default=-1) + 1)
+        self._optimal_elapsed = {}
+        for sector_id, sector in self.optimal_lap.items():
+            best_times[sector_id] = sector['time']
+            ts = sector['data']['timestamp']
+            self._optimal_elapsed[sector_id] = ts - ts[0]
+        self._refresh_optimal_total()
+        self._set_sector_boundaries(session_data.get('sector_boundaries', []))
+        self.corner_data = session_data.get('corner_data', {})
+        self._rebuild_corner_best()
+        self.brake_zones = deque(session_data.get('brake_zones', []), maxlen=BRAKE_ZONE_HISTORY)
+        self._brake_tree = None
+        self._lat0_cos = None
+        self.tire_degradation_history = deque(session_data.get('tire_degradation_history', []), maxlen=LOG_HISTORY)
+        self.driver_performance_metrics = deque(session_data.get('driver_performance_metrics', []), maxlen=LOG_HISTORY)
+        self.race_strategy_log = deque(session_data.get('race_strategy_log', []), maxlen=LOG_HISTORY)
         self.overtaking_opportunities = session_data.get('overtaking_opportunities', [])
         
+        self._reset_lap_stats()
+        for lap in self.lap_history:
+            self._update_lap_stats(lap)
+        
+        self.revision += 1
         return True
 
 
 # ========== API WRAPPER ==========
 
+class LapBuffer:
+    """
+    Points of the lap in progress as preallocated column arrays
+    Appends write in place; capacity doubles on the rare lap that outgrows it
+    """
+    
+    def __init__(self, capacity=LAP_BUFFER_POINTS):
+        self._cols = np.empty((4, capacity), dtype=np.float64)  # ts, lat, lon, speed
+        self.n = 0
+    
+    def __len__(self):
+        return self.n
+    
+    def _reserve(self, k):
+        """Make room for k more points"""
+        capacity = self._cols.shape[1]
+        if self.n + k > capacity:
+            grown = np.empty((4, max(capacity * 2, self.n + k)), dtype=np.float64)
+            grown[:, :self.n] = self._cols[:, :self.n]
+            self._cols = grown
+    
+    def append(self, point):
+        """Add one {timestamp, lat, lon, speed} point"""
+        self._reserve(1)
+        self._cols[:, self.n] = (point['timestamp'], point['lat'], point['lon'], point['speed'])
+        self.n += 1
+    
+    def extend(self, columns):
+        """Add points given as equal-length (ts, lat, lon, speed) arrays"""
+        k = len(columns[0])
+        self._reserve(k)
+        for col, values in zip(self._cols, columns):
+            col[self.n:self.n + k] = values
+        self.n += k
+    
+    def arrays(self):
+        """Buffered points as LapArrays views (overwritten once the buffer is reused)"""
+        ts, lat, lon, speed = self._cols[:, :self.n]
+        return LapArrays(ts, lat, lon, speed)
+    
+    def lap(self):
+        """Buffered points as LapArrays of fresh arrays, safe to keep past the lap"""
+        ts, lat, lon, speed = self._cols[:, :self.n].copy()
+        return LapArrays(ts, lat, lon, speed)
+    
+    def clear(self):
+        self.n = 0
+
+
 class RacingTelemetryAPI:
     """API wrapper for real-time telemetry processing"""
     
     def __init__(self, race_total_laps=20):
         self.engine = ProfessionalRacingEngine()
-        self.current_lap_buffer = []
         self.lap_start_time = None
         self.race_total_laps = race_total_laps
+        self.current_lap_buffer = LapBuffer()
+        self._reset_lap_buffer()
         
+        # Lap-level dashboard data, rebuilt when snapshot key changes
+        self._snapshot = None
+        self._snapshot_key = None
+        
+    def _reset_lap_buffer(self):
+        """Start an empty current lap (buffer plus the per-lap prediction state)"""
+        self.current_lap_buffer.clear()
+        
+        # Per-sector first/last timestamps of current_lap_buffer[:_sector_accum_n]
+        self._sector_accum = {}
+        self._sector_accum_n = 0
+        
+        # Last prediction, reused until the sector changes or PREDICTION_INTERVAL points pass
+        self._last_pred = None
+        self._last_pred_sector = -1
+        self._last_pred_n = 0
+    
     def process_telemetry_point(self, data_point):
         """Process real-time GPS + Speed data"""
         # Check for lap completion
         if self.should_start_new_lap(data_point):
             if self.current_lap_buffer:
-                lap_result = self.engine.process_lap(self.current_lap_buffer)
+                # Engine keeps views into the lap (sector data), so it gets its own copy
+                lap_result = self.engine.process_lap(self.current_lap_buffer.lap())
                 
                 # Generate race strategy
                 strategy = self.engine.generate_race_strategy(
@@ -940,7 +1375,7 @@ class RacingTelemetryAPI:
                     self.race_total_laps
                 )
                 
-                self.current_lap_buffer = []
+                self._reset_lap_buffer()
                 
                 return {
                     'lap_completed': True,
@@ -961,7 +1396,17 @@ class RacingTelemetryAPI:
                 data_point['timestamp'] - self.lap_start_time
             )
             
-            prediction = self.engine.predict_lap_time(self.current_lap_buffer, current_sector)
+            # Prediction only moves with sector times: refresh on sector change or every few points
+            n = len(self.current_lap_buffer)
+            if current_sector != self._last_pred_sector or n - self._last_pred_n >= PREDICTION_INTERVAL:
+                # Fold only points buffered since the last fold (batches extend the buffer directly)
+                self.engine.fold_sector_times(self._sector_accum, self.current_lap_buffer.arrays().ts,
+                                              self._sector_accum_n)
+                self._sector_accum_n = n
+                self._last_pred = self.engine.predict_lap_time_fast(self._sector_accum, current_sector)
+                self._last_pred_sector = current_sector
+                self._last_pred_n = n
+            prediction = self._last_pred
             
             return {
                 'lap_completed': False,
@@ -973,6 +1418,62 @@ class RacingTelemetryAPI:
         
         return {'lap_completed': False, 'delta': 0}
     
+    def process_telemetry_batch(self, data_points):
+        """
+        Process a batch of queued GPS + Speed points
+        Lap-finish checks run as one vectorized distance call per lap
+        A point that fails is dropped on its own, the rest of the batch continues
+        Returns list of completed lap results
+        """
+        completed_laps = []
+        n = len(data_points)
+        if n == 0:
+            return completed_laps
+        
+        batch = lap_arrays(data_points)
+        lats, lons = batch.lat, batch.lon
+        buffer = self.current_lap_buffer
+        
+        i = 0
+        while i < n:
+            # Lap start/finish bookkeeping goes through the single-point path
+            if not buffer or not self.lap_start_time:
+                self._process_batch_point(data_points[i], completed_laps)
+                i += 1
+                continue
+            
+            # Points below the minimum lap length never close a lap
+            unchecked = max(0, 50 - len(buffer))
+            if unchecked:
+                buffer.extend([col[i:i + unchecked] for col in batch])
+                i += unchecked
+                continue
+            
+            # Find first point back within 20 meters of start
+            start = buffer.arrays()
+            hit = first_within(start.lat[0], start.lon[0], lats[i:], lons[i:], 20)
+            if hit < 0:
+                buffer.extend([col[i:] for col in batch])
+                break
+            
+            finish = i + hit
+            buffer.extend([col[i:finish] for col in batch])
+            self._process_batch_point(data_points[finish], completed_laps)
+            i = finish + 1
+        
+        return completed_laps
+    
+    def _process_batch_point(self, data_point, completed_laps):
+        """Single-point path for batches, isolating failures to that point"""
+        try:
+            result = self.process_telemetry_point(data_point)
+        except Exception as e:
+            print("Telemetry Point Error:", e)
+            return
+        
+        if result.get('lap_completed'):
+            completed_laps.append(result)
+    
     def should_start_new_lap(self, data_point):
         """Detect lap start/finish"""
         if not self.current_lap_buffer or not self.lap_start_time:
@@ -982,30 +1483,44 @@ class RacingTelemetryAPI:
             return False
         
         # Check if returned to start position
-        start_point = self.current_lap_buffer[0]
-        distance = self.engine.haversine_distance(
-            start_point['lat'], start_point['lon'],
+        start = self.current_lap_buffer.arrays()
+        distance = haversine(
+            start.lat[0], start.lon[0],
             data_point['lat'], data_point['lon']
         )
         
         return distance < 20  # Within 20 meters of start
     
+    def get_current_position(self):
+        """Latest live GPS position (None before first point)"""
+        if not self.current_lap_buffer:
+            return None
+        lap = self.current_lap_buffer.arrays()
+        return {
+            "lat": lap.lat[-1].item(),
+            "lon": lap.lon[-1].item()
+        }
+    
     def get_dashboard_data(self):
         """Get complete dashboard data for frontend"""
+        return {
+            'current_position': self.get_current_position(),   # ✅ NEW FIELD
+            **self.get_dashboard_snapshot()
+        }
+    
+    def get_dashboard_snapshot(self):
+        """
+        Dashboard data that only changes per lap / session load / race length
+        Same dict object is returned until then
+        """
+        key = (self.engine.revision, self.race_total_laps)
+        if self._snapshot_key == key:
+            return self._snapshot
 
         latest_lap = self.engine.lap_history[-1] if self.engine.lap_history else None
+        stats = self.engine.lap_stats
 
-        # 🔥 Add current live position
-        current_position = None
-        if self.current_lap_buffer:
-            last_point = self.current_lap_buffer[-1]
-            current_position = {
-                "lat": last_point.get("lat"),
-                "lon": last_point.get("lon")
-            }
-
-        return {
-            'current_position': current_position,   # ✅ NEW FIELD
+        self._snapshot = {
             'optimal_lap': self.engine.get_optimal_lap_time(),
             'lap_history': self.engine.lap_history[-15:],
             'racing_line': self.engine.get_racing_line(),
@@ -1019,11 +1534,13 @@ class RacingTelemetryAPI:
             ) if self.engine.lap_history else None,
             'overtaking_zones': self.engine.overtaking_opportunities,
             'session_stats': {
-                'total_laps': len(self.engine.lap_history),
-                'best_lap': min(self.engine.lap_history, key=lambda x: x['total_time']) if self.engine.lap_history else None,
-                'avg_lap_time': np.mean([l['total_time'] for l in self.engine.lap_history]) if self.engine.lap_history else None
+                'total_laps': stats['n'],
+                'best_lap': stats['best'],
+                'avg_lap_time': stats['sum'] / stats['n'] if stats['n'] else None
             }
         }
+        self._snapshot_key = key
+        return self._snapshot
 
 
     def set_race_total_laps(self, total_laps):
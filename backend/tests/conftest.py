@@ -0,0 +1,35 @@
+import math
+import os
+import random
+import sys
+
+import pytest
+
+# Backend modules are imported as top-level modules (see Dockerfile)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_lap_feed(n_laps=6, per_lap=300, seed=1):
+    """Synthetic laps around the NMIT track centre with corners every 120 deg"""
+    rnd = random.Random(seed)
+    lat0, lon0 = 13.128145, 77.58717
+    points = []
+    t = 1000.0
+    for lap in range(n_laps):
+        for i in range(per_lap):
+            a = 2 * math.pi * i / per_lap
+            r = 0.0015 * (1 + 0.3 * math.sin(3 * a))
+            speed = 45 + 20 * math.sin(3 * a + 0.5) + rnd.uniform(-2, 2) - lap * 0.3
+            points.append({
+                'lat': lat0 + r * math.cos(a),
+                'lon': lon0 + r * math.sin(a),
+                'speed': max(speed, 5.0),
+                'timestamp': t
+            })
+            t += 0.2 + 0.002 * lap + rnd.uniform(0, 0.01)
+    return points
+
+
+@pytest.fixture
+def lap_feed():
+    return make_lap_feed()
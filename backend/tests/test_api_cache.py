@@ -0,0 +1,121 @@
+import gzip
+import os
+
+import numpy as np
+import orjson
+import pytest
+
+import racing_api_server as server
+from racing_engine_gps_speed import RacingTelemetryAPI
+
+BINARY = {'Accept': 'application/octet-stream'}
+
+
+@pytest.fixture
+def client(lap_feed, monkeypatch):
+    api = RacingTelemetryAPI(race_total_laps=10)
+    api.process_telemetry_batch([dict(p) for p in lap_feed])
+    monkeypatch.setattr(server, 'telemetry_api', api)
+    monkeypatch.setattr(server, '_cache', {})
+    monkeypatch.setattr(server.compress.cache, '_store', {})
+    return server.app.test_client()
+
+
+def test_cached_binary_racing_line_keeps_headers(client):
+    first = client.get('/api/racing_line', headers=BINARY)
+    second = client.get('/api/racing_line', headers=BINARY)
+
+    assert first.data == second.data
+    for response in (first, second):
+        assert response.mimetype == 'application/octet-stream'
+        assert response.headers['X-Fields'] == 'lat,lon'
+        assert 'Accept' in response.headers['Vary']
+
+    line = np.frombuffer(second.data, dtype='<f4').reshape(-1, 2)
+    assert line.shape[0] == len(client.get('/api/racing_line').json)
+
+
+def test_negotiated_endpoints_vary_on_accept(client):
+    for path in ('/api/racing_line', '/api/lap_history'):
+        for headers in ({}, BINARY):
+            assert 'Accept' in client.get(path, headers=headers).headers['Vary']
+
+
+def test_compressed_cache_hit_tracks_engine_state(client, lap_feed):
+    gz = {'Accept-Encoding': 'gzip'}
+    first = client.get('/api/session_stats', headers=gz)
+    second = client.get('/api/session_stats', headers=gz)
+    assert first.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(second.data) == gzip.decompress(first.data)
+
+    # Another lap changes the state key, so a fresh body is compressed
+    server.telemetry_api.process_telemetry_batch([dict(p) for p in lap_feed[:300]])
+    third = client.get('/api/session_stats', headers=gz)
+    stats = orjson.loads(gzip.decompress(third.data))
+    assert stats['total_laps'] == len(server.telemetry_api.engine.lap_history)
+    assert gzip.decompress(third.data) != gzip.decompress(first.data)
+
+
+def test_unchanged_state_returns_304(client, lap_feed):
+    first = client.get('/api/racing_line', headers=BINARY)
+    etag = first.headers['ETag']
+
+    again = client.get('/api/racing_line', headers={**BINARY, 'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+    assert again.headers['ETag'] == etag
+
+    # JSON variant has its own tag
+    assert client.get('/api/racing_line', headers={'If-None-Match': etag}).status_code == 200
+
+    server.telemetry_api.process_telemetry_batch([dict(p) for p in lap_feed[:300]])
+    changed = client.get('/api/racing_line', headers={**BINARY, 'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+
+def test_compressed_etag_returns_304(client):
+    br = {'Accept-Encoding': 'br'}
+    first = client.get('/api/session_stats', headers=br)
+    assert first.headers['Content-Encoding'] == 'br'
+    etag = first.headers['ETag']
+    assert etag.endswith(':br"')
+
+    # Client echoes the compressed tag; gzip clients share the same state
+    for encoding in ('br', 'gzip'):
+        again = client.get('/api/session_stats', headers={
+            'Accept-Encoding': encoding, 'If-None-Match': etag
+        })
+        assert again.status_code == 304
+        assert again.data == b''
+
+
+def test_forked_worker_gets_new_etag(client, monkeypatch):
+    etag = client.get('/api/session_stats').headers['ETag']
+
+    # Respawned worker under preload_app: same module state, new pid
+    monkeypatch.setattr(server.os, 'getpid', lambda: 0)
+    again = client.get('/api/session_stats', headers={'If-None-Match': etag})
+    assert again.status_code == 200
+    assert again.headers['ETag'] != etag
+
+
+def test_save_session_is_queued_and_reports_failures(client, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    engine = server.telemetry_api.engine
+
+    response = client.post('/api/save_session')
+    assert response.status_code == 202
+    assert response.json['status'] == 'QUEUED'
+    engine.wait_for_save()
+    assert os.path.exists(response.json['filename'])
+    assert engine.last_save_error is None
+
+    def fail(session_data, filename):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(engine, '_write_session', fail)
+    client.post('/api/save_session')
+    engine.wait_for_save()
+    assert engine.last_save_error == 'OSError: disk full'
+    assert client.post('/api/save_session').json['last_save_error'] == 'OSError: disk full'
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from scipy.signal import savgol_filter
+
+from racing_engine_gps_speed import ProfessionalRacingEngine, lap_arrays
+
+
+@pytest.mark.parametrize('n', [11, 12, 300])
+def test_smooth_speeds_matches_savgol_filter(n):
+    speeds = np.random.default_rng(n).uniform(5, 70, n)
+    smoothed = ProfessionalRacingEngine()._smooth_speeds(speeds)
+    np.testing.assert_allclose(smoothed, savgol_filter(speeds, 11, 2), rtol=0, atol=1e-9)
+
+
+def make_lap(n=300, seed=0):
+    rnd = np.random.default_rng(seed)
+    speeds = 40 + 25 * np.sin(np.linspace(0, 6 * np.pi, n)) + rnd.uniform(-6, 6, n)
+    return [
+        {'lat': 13.128 + i * 1e-5, 'lon': 77.587, 'speed': float(v), 'timestamp': 1000.0 + 0.2 * i}
+        for i, v in enumerate(speeds)
+    ]
+
+
+def test_zone_detectors_flag_expected_samples():
+    lap = make_lap()
+    speeds = [p['speed'] for p in lap]
+    arrays = lap_arrays(lap)
+    engine = ProfessionalRacingEngine()
+
+    brake = [i for i in range(1, len(speeds) - 1) if speeds[i-1] - speeds[i] > 3]
+    accel = [i for i in range(1, len(speeds) - 1) if speeds[i] - speeds[i-1] > 2]
+    assert [z['index'] for z in engine.detect_brake_zones(arrays)] == brake
+    assert [z['index'] for z in engine.detect_acceleration_zones(arrays)] == accel
+
+    smoothed = savgol_filter(speeds, 11, 2)
+    corners = [
+        i for i in range(5, len(smoothed) - 5)
+        if smoothed[i] < smoothed[i-3] and smoothed[i] < smoothed[i+3] and smoothed[i] < 40
+    ]
+    assert corners
+    assert [c['index'] for c in engine.detect_corners_advanced(arrays)] == corners
+
+
+def test_overtaking_zones_match_window_scan():
+    lap = make_lap(seed=3)
+    speeds = [p['speed'] for p in lap]
+
+    fast = [i for i in range(5, len(speeds) - 5) if np.mean(speeds[i-5:i+5]) > 50]
+    exits = [i for i in range(1, len(speeds) - 5) if speeds[i] < 35 and speeds[i+5] > speeds[i] + 10]
+    assert fast and exits
+
+    zones = ProfessionalRacingEngine().detect_overtaking_zones(lap_arrays(lap))
+    assert [z['index'] for z in zones if z['type'] == 'HIGH_SPEED_STRAIGHT'] == fast
+    assert [z['index'] for z in zones if z['type'] == 'CORNER_EXIT'] == exits
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from racing_engine_gps_speed import RacingTelemetryAPI
+
+
+def feed_points(points):
+    api = RacingTelemetryAPI(race_total_laps=10)
+    for p in points:
+        api.process_telemetry_point(dict(p))
+    return api
+
+
+def feed_batches(points, batch_size):
+    api = RacingTelemetryAPI(race_total_laps=10)
+    completed = []
+    for i in range(0, len(points), batch_size):
+        completed += api.process_telemetry_batch([dict(p) for p in points[i:i + batch_size]])
+    return api, completed
+
+
+@pytest.mark.parametrize('batch_size', [1, 37, 1000])
+def test_batch_matches_point_by_point(lap_feed, batch_size):
+    expected = feed_points(lap_feed)
+    api, completed = feed_batches(lap_feed, batch_size)
+
+    expected_times = [lap['total_time'] for lap in expected.engine.lap_history]
+    assert len(expected_times) >= 5
+    assert [lap['total_time'] for lap in api.engine.lap_history] == expected_times
+    assert [r['lap_data']['total_time'] for r in completed] == expected_times
+    for col, expected_col in zip(api.current_lap_buffer.arrays(), expected.current_lap_buffer.arrays()):
+        np.testing.assert_array_equal(col, expected_col)
+    assert api.lap_start_time == expected.lap_start_time
+    assert api.engine.optimal_lap.keys() == expected.engine.optimal_lap.keys()
+
+
+def test_batch_failure_only_drops_failing_point(lap_feed, monkeypatch):
+    api = RacingTelemetryAPI(race_total_laps=10)
+    process_lap = api.engine.process_lap
+    calls = []
+
+    def flaky_process_lap(lap_data):
+        calls.append(len(lap_data))
+        if len(calls) == 1:
+            raise RuntimeError('boom')
+        return process_lap(lap_data)
+
+    monkeypatch.setattr(api.engine, 'process_lap', flaky_process_lap)
+    api.process_telemetry_batch([dict(p) for p in lap_feed])
+
+    # First lap close failed, later laps in the same batch still processed
+    assert len(calls) > 1
+    assert len(api.engine.lap_history) == len(calls) - 1